@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Локальный поддельный Bot API для бенчмарков.
+
+Отвечает на методы, которые вызывает бот (getMe, deleteWebhook, getUpdates,
+sendMessage, ...), отдаёт заранее положенные обновления и записывает время
+каждого исходящего вызова. Только стандартная библиотека.
+"""
+
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "Fake",
+    "username": "fake_bot",
+}
+
+# Методы, которые возвращают Message
+MESSAGE_METHODS = {
+    "sendMessage",
+    "sendPhoto",
+    "sendDocument",
+    "editMessageText",
+    "editMessageReplyMarkup",
+    "sendInvoice",
+}
+
+
+class FakeBotAPI:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        # Искусственная задержка ответа на исходящие вызовы (имитация сети до api.telegram.org)
+        self.latency = latency
+        self.updates: List[Dict[str, Any]] = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.calls = collections.Counter()
+        # (time.monotonic(), метод, chat_id) для каждого исходящего вызова
+        self.sent: List[tuple] = []
+        self.cond = threading.Condition()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                try:
+                    api._handle(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Бот завершили посреди long polling — отвечать уже некому
+                    self.close_connection = True
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset(self) -> None:
+        with self.cond:
+            self.updates.clear()
+            self.sent.clear()
+            self.calls.clear()
+
+    def push_message(self, text: str, user_id: int = 100, language_code: str = "ru") -> int:
+        """Положить входящее текстовое сообщение (команды размечаются как bot_command)"""
+        with self.cond:
+            update_id = self.next_update_id
+            self.next_update_id += 1
+            message = {
+                "message_id": self._message_id(),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {
+                    "id": user_id,
+                    "is_bot": False,
+                    "first_name": "Bench",
+                    "username": f"bench{user_id}",
+                    "language_code": language_code,
+                },
+                "text": text,
+            }
+            if text.startswith("/"):
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            self.updates.append({"update_id": update_id, "message": message})
+            self.cond.notify_all()
+            return update_id
+
+    def wait_sent(self, count: int, timeout: float, method: str = "sendMessage") -> bool:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while sum(1 for _, m, _ in self.sent if m == method) < count:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return False
+                self.cond.wait(left)
+            return True
+
+    def _message_id(self) -> int:
+        message_id = self.next_message_id
+        self.next_message_id += 1
+        return message_id
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        method = request.path.rstrip("/").rsplit("/", 1)[-1]
+        length = int(request.headers.get("Content-Length") or 0)
+        params = self._parse(request.headers.get("Content-Type", ""), request.rfile.read(length))
+
+        with self.cond:
+            self.calls[method] += 1
+
+        if method == "getUpdates":
+            result = self._get_updates(params)
+        else:
+            if self.latency:
+                time.sleep(self.latency)
+            result = self._result(method, params)
+            with self.cond:
+                self.sent.append((time.monotonic(), method, params.get("chat_id")))
+                self.cond.notify_all()
+
+        body = json.dumps({"ok": True, "result": result}).encode()
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    @staticmethod
+    def _parse(content_type: str, raw: bytes) -> Dict[str, Any]:
+        if not raw:
+            return {}
+        if "application/json" in content_type:
+            return json.loads(raw)
+        if "multipart/form-data" in content_type:
+            # Файлы в бенчмарках не отправляются
+            return {}
+        params = {}
+        for key, values in parse_qs(raw.decode()).items():
+            try:
+                params[key] = json.loads(values[0])
+            except ValueError:
+                params[key] = values[0]
+        return params
+
+    def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # drop_pending_updates не эмулируется: положенные заранее обновления отдаются после старта
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        # Long polling, но не дольше секунды, чтобы бенчмарк быстро завершался
+        wait = min(float(params.get("timeout") or 0), 1.0)
+        deadline = time.monotonic() + wait
+        with self.cond:
+            while True:
+                self.updates = [u for u in self.updates if u["update_id"] >= offset]
+                if self.updates:
+                    return self.updates[:limit]
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return []
+                self.cond.wait(left)
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Optional[Any]:
+        if method == "getMe":
+            return BOT_USER
+        if method in MESSAGE_METHODS:
+            with self.cond:
+                message_id = params.get("message_id") or self._message_id()
+            return {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": params.get("chat_id") or 0, "type": "private"},
+                "from": BOT_USER,
+                "text": params.get("text") or "",
+            }
+        return True
+
+
+if __name__ == "__main__":
+    api = FakeBotAPI(port=8081).start()
+    print(f"Fake Bot API: {api.base_url}<token>/<method>")
+    try:
+        api.thread.join()
+    except KeyboardInterrupt:
+        api.stop()
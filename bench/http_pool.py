@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Нагрузочный бенчмарк пула HTTP-соединений к Bot API.
+
+Шлёт пачку параллельных sendMessage (как при всплеске уведомлений админу)
+в локальный поддельный Bot API с искусственной сетевой задержкой и сравнивает
+пропускную способность и ожидание слота в пуле для разных настроек клиента.
+
+Пример: python bench/http_pool.py --messages 500 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from fake_bot_api import FakeBotAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run_burst(api: FakeBotAPI, request, messages: int) -> float:
+    from telegram import Bot
+
+    bot = Bot("123456:bench", base_url=api.base_url, request=request)
+    async with bot:
+        started = time.monotonic()
+        await asyncio.gather(*(
+            bot.send_message(chat_id=100, text=f"#{i}") for i in range(messages)
+        ))
+        return time.monotonic() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа поддельного API, с")
+    parser.add_argument("--pool-sizes", default="1,8", help="размеры пула для сравнения с настройками из env")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TG_BOT_TOKEN", "123456:bench")
+    os.environ.setdefault("DEADLINES_DB", os.path.join(tempfile.gettempdir(), "bench_deadlines.sqlite3"))
+    sys.path.insert(0, ROOT)
+    import main as bot_main
+
+    api = FakeBotAPI(latency=args.latency).start()
+    try:
+        variants = []
+        for size in (int(s) for s in args.pool_sizes.split(",") if s.strip()):
+            # Долгий pool_timeout: сравниваем ожидание, а не ошибки таймаута
+            variants.append((f"пул {size}", bot_main.InstrumentedRequest(
+                name=f"pool{size}", connection_pool_size=size, pool_timeout=600.0
+            )))
+        variants.append((f"env (пул {bot_main.HTTP_POOLS['bot']['pool_size']})", bot_main.build_request("bot")))
+
+        print(f"{'клиент':<16} {'сообщ./с':>10} {'ждали слот':>11} {'ср. ожидание, мс':>17} {'макс., мс':>10}")
+        for title, request in variants:
+            elapsed = asyncio.run(run_burst(api, request, args.messages))
+            stats = request.stats
+            avg_ms = stats["wait_total"] / stats["requests"] * 1000 if stats["requests"] else 0.0
+            print(
+                f"{title:<16} {args.messages / elapsed:>10.1f} {stats['waited']:>11} "
+                f"{avg_ms:>17.1f} {stats['wait_max'] * 1000:>10.1f}"
+            )
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Бенчмарк холодного старта.
+
+Измеряет (медиана по запускам):
+- время импорта main.py;
+- время от запуска процесса до ответа на первое обновление (/start)
+  через локальный поддельный Bot API.
+
+Пример: python bench/startup.py --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_bot_api import FakeBotAPI
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def bench_env(api: FakeBotAPI, db_path: str) -> dict:
+    env = dict(os.environ)
+    env.pop("WEBHOOK_URL", None)
+    env.update({
+        "TG_BOT_TOKEN": "123456:bench",
+        "BOT_API_BASE_URL": api.base_url,
+        "ADMIN_CHAT_ID": "1",
+        "PAYMENTS_PROVIDER_TOKEN": "",
+        "DEADLINES_DB": db_path,
+    })
+    return env
+
+
+def measure_import(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_first_update(api: FakeBotAPI, env: dict, timeout: float) -> float:
+    api.reset()
+    api.push_message("/start")
+    # Тот же источник времени, что и в FakeBotAPI.sent
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not api.wait_sent(1, timeout):
+            raise RuntimeError("бот не ответил на /start")
+        # В sent попадают и служебные вызовы (getMe, deleteWebhook) — нужен первый ответ
+        return next(at for at, method, _ in api.sent if method == "sendMessage") - started
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    api = FakeBotAPI().start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = bench_env(api, os.path.join(tmp, "deadlines.sqlite3"))
+            imports = [measure_import(env) for _ in range(args.runs)]
+            firsts = [measure_first_update(api, env, args.timeout) for _ in range(args.runs)]
+            print(f"{'импорт, мс':>12} {'до 1-го обновления, мс':>24}")
+            print(
+                f"{statistics.median(imports) * 1000:>12.1f} "
+                f"{statistics.median(firsts) * 1000:>24.1f}"
+            )
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
+import asyncio
+import collections
+import heapq
+import importlib.util
+import json
 import logging
 import os
+import sqlite3
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+import httpx
 from telegram import (
     Update,
     ReplyKeyboardMarkup,
@@ -22,9 +29,20 @@ from telegram.ext import (
     ConversationHandler,
     CallbackQueryHandler,
     PreCheckoutQueryHandler,
+    TypeHandler,
+    ApplicationHandlerStop,
     Application,
 )
-from telegram.error import Forbidden, TelegramError
+from telegram.error import Forbidden, TelegramError, TimedOut
+from telegram.request import HTTPXRequest
+
+from pricing import (
+    BASE_PRICES,
+    BASE_PRICES_EUR,
+    ITEMIZED_TYPES,
+    calculate_price,
+    calculate_cart_price,
+)
 
 # ========== КОНФИГУРАЦИЯ ==========
 TOKEN = os.getenv("TG_BOT_TOKEN")
@@ -40,6 +58,70 @@ CURRENCY = "RUB"
 EMOJI_PRIMARY = "🔵"
 EMOJI_SECONDARY = "⚪️"
 
+# Язык по умолчанию — если язык пользователя Telegram не сообщил
+DEFAULT_LANG = os.getenv("DEFAULT_LANG", "ru")
+# Язык для остальных кодов, для которых нет пакета (de, fr, tr, ...)
+FALLBACK_LANG = os.getenv("FALLBACK_LANG", "en")
+# Уведомления администратору всегда на этом языке
+ADMIN_LANG = "ru"
+LOCALES_DIR = os.getenv(
+    "LOCALES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+)
+CURRENCY_SYMBOLS = {"rub": "₽", "eur": "€"}
+
+# Напоминания о сроках: за сколько часов до дедлайна (0 — в момент дедлайна)
+DEADLINES_DB = os.getenv("DEADLINES_DB", "deadlines.sqlite3")
+REMINDER_OFFSETS_HOURS = sorted(
+    {float(h) for h in os.getenv("REMINDER_OFFSETS_HOURS", "24,3,0").split(",") if h.strip()},
+    reverse=True
+)
+REMIND_CUSTOMER = os.getenv("REMIND_CUSTOMER", "0") == "1"
+REMINDER_TICK_SECONDS = int(os.getenv("REMINDER_TICK_SECONDS", "60"))
+
+# Адрес Bot API (например, локальный сервер для бенчмарков); по умолчанию — api.telegram.org
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL", "")
+
+# Пулы HTTP-соединений к Bot API: отдельно для long polling (getUpdates) и для
+# исходящих вызовов, чтобы всплески уведомлений не ждали слот за getUpdates.
+# HTTP/2 требует пакет h2 (pip install "httpx[http2]"), без него — HTTP/1.1.
+HTTP2 = os.getenv("HTTP2", "0") == "1"
+HTTP_POOLS = {
+    "bot": {
+        "pool_size": int(os.getenv("HTTP_POOL_SIZE", "64")),
+        "keepalive": int(os.getenv("HTTP_KEEPALIVE", "32")),
+        "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        "connect_timeout": float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        "read_timeout": float(os.getenv("HTTP_READ_TIMEOUT", "10")),
+        "write_timeout": float(os.getenv("HTTP_WRITE_TIMEOUT", "10")),
+        "pool_timeout": float(os.getenv("HTTP_POOL_TIMEOUT", "5")),
+    },
+    "updates": {
+        "pool_size": int(os.getenv("UPDATES_POOL_SIZE", "1")),
+        "keepalive": int(os.getenv("UPDATES_KEEPALIVE", "1")),
+        "keepalive_expiry": float(os.getenv("UPDATES_KEEPALIVE_EXPIRY", "30")),
+        "connect_timeout": float(os.getenv("UPDATES_CONNECT_TIMEOUT", "5")),
+        # К read_timeout PTB сам добавляет POLL_TIMEOUT
+        "read_timeout": float(os.getenv("UPDATES_READ_TIMEOUT", "5")),
+        "write_timeout": float(os.getenv("UPDATES_WRITE_TIMEOUT", "5")),
+        "pool_timeout": float(os.getenv("UPDATES_POOL_TIMEOUT", "1")),
+    },
+}
+# Таймаут long polling для getUpdates, секунды
+POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", "10"))
+
+# Защита от флуда: не больше FLOOD_MAX_UPDATES обновлений от пользователя за
+# FLOOD_WINDOW_SECONDS, иначе — пауза (удваивается при повторах, но не дольше максимума;
+# после FLOOD_MUTE_MAX_SECONDS без пауз удвоение сбрасывается).
+# Фото и файлы одного альбома (media group) считаются одним обновлением.
+# На одинаковые ошибки ввода бот отвечает не чаще раза за окно.
+FLOOD_WINDOW_SECONDS = float(os.getenv("FLOOD_WINDOW_SECONDS", "10"))
+FLOOD_MAX_UPDATES = int(os.getenv("FLOOD_MAX_UPDATES", "20"))
+FLOOD_MUTE_SECONDS = float(os.getenv("FLOOD_MUTE_SECONDS", "60"))
+FLOOD_MUTE_MAX_SECONDS = float(os.getenv("FLOOD_MUTE_MAX_SECONDS", "3600"))
+# Сколько пользователей держим в памяти (давно неактивные вытесняются)
+FLOOD_MAX_TRACKED_USERS = int(os.getenv("FLOOD_MAX_TRACKED_USERS", "10000"))
+
 # ========== ЛОГГИРОВАНИЕ ==========
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -59,134 +141,28 @@ logger = logging.getLogger(__name__)
     WAITING_FOR_RECEIPT,
 ) = range(8)
 
-# ========== ЦЕНЫ В РУБЛЯХ ==========
-BASE_PRICES = {
-    "Задание": 199,
-    "Лабораторная/Контрольная": 499,
-    "Экзаменационный вопрос": 599,
-    "Практика": 2999,
-    "Курсовая": 6999,
-    "Дипломная": 19999,
-    "Презентация для курсовой": 1999,
-    "Презентация для диплома": 4999,
-}
-
-# ========== ЦЕНЫ В ЕВРО ==========
-BASE_PRICES_EUR = {k: v // 100 for k, v in BASE_PRICES.items()}
-
-# ========== ДОПЛАТА ЗА ОБЪЯСНЕНИЯ ==========
-EXPLAIN_SURCHARGES = {
-    "default": 1999,
-    "Курсовая": 3999,
-    "Дипломная": 9999,
-    "Практика": 999,
-}
-
-# ========== ПЕРЕВОДЫ ТИПОВ РАБОТ ==========
-WORK_TYPES_TRANSLATIONS = {
-    "Задание": "Assignment",
-    "Лабораторная/Контрольная": "Lab / Quiz",
-    "Экзаменационный вопрос": "Exam Question",
-    "Практика": "Practice",
-    "Курсовая": "Coursework",
-    "Дипломная": "Thesis",
-    "Презентация для курсовой": "Presentation for Coursework",
-    "Презентация для диплома": "Presentation for Thesis",
-}
-
-# ========== ГЕНЕРАЦИЯ ПРАЙС-ЛИСТА ==========
-price_lines = []
-for work_type, rub_price in BASE_PRICES.items():
-    en_type = WORK_TYPES_TRANSLATIONS.get(work_type, work_type)
-    eur_price = BASE_PRICES_EUR[work_type]
-    price_lines.append(f"• {work_type} — {rub_price}₽ / {eur_price}€ ({en_type})")
-
-price_list_text = "\n".join(price_lines)
-
 # ========== ФУНКЦИИ ==========
-def calculate_price(selection: Dict[str, Any]) -> Dict[str, Any]:
-    t = selection["type"]
-    explain = selection.get("explain", False)
-    days = int(selection.get("days", 0))
-    extra_count = int(selection.get("extra_count", 1))
-
-    breakdown_rub = []
-    breakdown_eur = []
-    total_rub = 0
-    total_eur = 0
-
-    if t in ("Задание", "Лабораторная/Контрольная", "Экзаменационный вопрос"):
-        base_rub = BASE_PRICES[t] * extra_count
-        base_eur = BASE_PRICES_EUR[t] * extra_count
-        en_name = WORK_TYPES_TRANSLATIONS[t]
-        breakdown_rub.append(f"{t} — {BASE_PRICES[t]}₽ × {extra_count} = {base_rub}₽")
-        breakdown_eur.append(f"{en_name} — {BASE_PRICES_EUR[t]}€ × {extra_count} = {base_eur}€")
-        total_rub += base_rub
-        total_eur += base_eur
-    else:
-        base_rub = BASE_PRICES[t]
-        base_eur = BASE_PRICES_EUR[t]
-        en_name = WORK_TYPES_TRANSLATIONS[t]
-        breakdown_rub.append(f"{t} = {base_rub}₽")
-        breakdown_eur.append(f"{en_name} = {base_eur}€")
-        total_rub += base_rub
-        total_eur += base_eur
-
-    if explain:
-        surcharge_rub = EXPLAIN_SURCHARGES.get(t, EXPLAIN_SURCHARGES["default"])
-        surcharge_eur = surcharge_rub // 100
-        breakdown_rub.append(f"За объяснения = +{surcharge_rub}₽")
-        breakdown_eur.append(f"For explanations = +{surcharge_eur}€")
-        total_rub += surcharge_rub
-        total_eur += surcharge_eur
-
-    urgency_rub = 0
-    urgency_eur = 0
-    if days > 0:
-        if t in ("Задание", "Лабораторная/Контрольная"):
-            urgency_rub = max(1000 - 100 * (days - 1), 0)
-        elif t == "Экзаменационный вопрос":
-            urgency_rub = max(1500 - 100 * (days - 1), 0)
-        elif t == "Практика":
-            urgency_rub = max(4000 - 250 * (days - 1), 0)
-        elif t in ("Курсовая", "Презентация для курсовой"):
-            urgency_rub = max(6000 - 250 * (days - 1), 0)
-        elif t in ("Дипломная", "Презентация для диплома"):
-            base = BASE_PRICES[t]
-            max_urgency = 2 * base
-            urgency_val = max_urgency - 250 * (days - 1)
-            urgency_rub = max(urgency_val, base) - base
-
-        urgency_rub = int(max(urgency_rub, 0))
-        urgency_eur = urgency_rub // 100
-
-        if urgency_rub > 0:
-            breakdown_rub.append(f"Срочность ({days} дн) = +{urgency_rub}₽")
-            breakdown_eur.append(f"Urgency ({days} days) = +{urgency_eur}€")
-            total_rub += urgency_rub
-            total_eur += urgency_eur
-        else:
-            breakdown_rub.append(f"Срочность ({days} дн) = +0₽")
-            breakdown_eur.append(f"Urgency ({days} days) = +0€")
-    else:
-        if days == 0:
-            breakdown_rub.append("Срочность = +0₽")
-            breakdown_eur.append("Urgency = +0€")
+def get_cart_items(context: ContextTypes.DEFAULT_TYPE) -> List[Dict[str, Any]]:
+    """Все позиции заказа: уже добавленные в корзину + текущая"""
+    items = list(context.user_data.get("cart", []))
+    order = context.user_data.get("order", {})
+    if order.get("type"):
+        items.append(order)
+    return items
 
-    return {
-        "total_rub": total_rub,
-        "total_eur": total_eur,
-        "breakdown_rub": breakdown_rub,
-        "breakdown_eur": breakdown_eur,
-    }
+def reset_user_data(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Сброс заказа с сохранением выбранного языка"""
+    lang = context.user_data.get("lang")
+    context.user_data.clear()
+    if lang:
+        context.user_data["lang"] = lang
 
-def make_reply_markup(options: list, include_cancel=True) -> ReplyKeyboardMarkup:
+def make_reply_markup(options: list, cancel_label: str = None) -> ReplyKeyboardMarkup:
     buttons = []
     for opt in options:
-        en_opt = WORK_TYPES_TRANSLATIONS.get(opt, opt)
-        buttons.append([KeyboardButton(f"{EMOJI_PRIMARY} {opt} / {en_opt}")])
-    if include_cancel:
-        buttons.append([KeyboardButton("❌ Отменить заказ / Cancel order")])
+        buttons.append([KeyboardButton(f"{EMOJI_PRIMARY} {opt}")])
+    if cancel_label:
+        buttons.append([KeyboardButton(cancel_label)])
     return ReplyKeyboardMarkup(buttons, one_time_keyboard=True, resize_keyboard=True)
 
 def parse_choice_text(text: str) -> str:
@@ -195,124 +171,353 @@ def parse_choice_text(text: str) -> str:
     clean = text.strip()
     if clean.startswith(EMOJI_PRIMARY) or clean.startswith(EMOJI_SECONDARY):
         clean = clean[1:].strip()
-    if " / " in clean:
-        clean = clean.split(" / ")[0].strip()
     return clean
 
-# ========== ТЕКСТЫ СООБЩЕНИЙ ==========
-PHRASES = {
-    "start_welcome": (
-        f"{EMOJI_PRIMARY} <b>Заходи за решением! / Come in for a solution!</b>\n\n"
-        "Привет! Я помогу вам оперативно и качественно решить учебные задания.\n"
-        "Hi! I'll help you solve your academic assignments quickly and reliably.\n\n"
-        "<b>Прайс-лист / Price List</b> 💰\n\n"
-        f"{price_list_text}"
-    ),
-    "start_types": "Выберите тип работы / Choose work type:",
-    "type_chosen": "Вы выбрали: {ru} / You have chosen: {en}.",
-    "send_file_prompt": (
-        "📌 Пришлите, пожалуйста, <b>фото, файл или текст с заданием</b>.\n"
-        "Можно добавить пояснения в подпись (caption) к файлу или фото.\n\n"
-        "📌 Please send <b>photo, file or text with your assignment</b>.\n"
-        "Caption allowed."
-    ),
-    "file_received": "✅ Файл задания получен. Теперь выберите: нужны ли объяснения?\n✅ Assignment file received. Need explanations?",
-    "photo_received": "✅ Фото задания получено. Теперь выберите: нужны ли объяснения?\n✅ Assignment photo received. Need explanations?",
-    "text_received": "✅ Текст задания получен. Теперь выберите: нужны ли объяснения?\n✅ Assignment text received. Need explanations?",
-    "send_file_error": (
-        "Пожалуйста, отправьте задание в виде текста, фото или файла (можно с подписью).\n"
-        "Please send assignment as text, photo or file (caption allowed)."
-    ),
-    "explain_prompt": (
-        "Нужны ли подробные объяснения каждого шага решения?\n"
-        "За +1999₽ (за задания) / +3999₽ (за Курсовую) / +999₽ (за Практику) / +9999₽ (за Дипломную) — я подробно объясню каждое задание и весь ход решения.\n\n"
-        "Need detailed explanations?\n"
-        "For +20€ (Assignments) / +40€ (Coursework) / +10€ (Practice) / +100€ (Thesis) — I'll explain each task and the entire solution process in detail."
-    ),
-    "explain_yes": "✅ Объяснения включены.\n✅ Explanations enabled.",
-    "explain_no": "✅ Объяснения отключены.\n✅ Explanations disabled.",
-    "explain_error": (
-        "Пожалуйста, нажмите «Да / Yes» или «Нет / No».\n"
-        "Please press «Да / Yes» or «Нет / No»."
-    ),
-    "deadline_prompt": (
-        "Укажите срок выполнения в днях (целое число). Пример: 3\n"
-        "(минимум 1 день).\n\n"
-        "Specify deadline in days (integer). Example: 3\n"
-        "(minimum 1 day)."
-    ),
-    "extra_params_prompt": (
-        "Укажите количество заданий (целое число). Пример: 3\n"
-        "Specify number of tasks (integer). Example: 3"
-    ),
-    "confirmation_summary": (
-        "<b>Итог заказа / Order Summary</b>\n"
-        "Тип / Type: {type}\n"
-        "Объяснения / Explanations: {explain}\n"
-        "Срок / Deadline: {days} дн / days\n"
-        "{extra_count_line}"
-        "\n<b>Детализация / Breakdown:</b>\n"
-        "{breakdown_rub}\n"
-        "{breakdown_eur}\n"
-        "\n<b>Итого / Total: {total_rub}₽ / {total_eur}€</b>"
-    ),
-    "confirm_button": "✅ Подтвердить и оплатить / Confirm & Pay",
-    "cancel_button": "❌ Отменить заказ / Cancel Order",
-    "payment_prompt": (
-        "✅ Оплата заказа:\n\n"
-        "<b>Переведите {total_rub} ₽ ({total_eur}€)</b> на карту:\n"
-        "<code>2200 7013 9298 5914</code>\n\n"
-        "⚠️ После оплаты отправьте сюда <b>скриншот чека</b> (фото или документ) — я уведомлю администратора, и заказ будет подтверждён.\n\n"
-        "❗ Срок выполнения начинается с момента получения чека.\n\n"
-        "✅ Payment:\n\n"
-        "<b>Transfer {total_rub} ₽ ({total_eur}€)</b> to card:\n"
-        "<code>2200 7013 9298 5914</code>\n\n"
-        "⚠️ After payment, send a <b>screenshot</b> (photo/document) — I'll notify admin, and order will be confirmed.\n\n"
-        "❗ Deadline starts when payment is confirmed."
-    ),
-    "successful_payment": (
-        "✅ Оплата получена! Спасибо!\n\n"
-        "Администратор скоро свяжется с вами.\n"
-        "💬 <b>Вся дальнейшая работа — правки, уточнения, сдача — будет вестись напрямую с исполнителем в личных сообщениях.</b>\n\n"
-        "Хотите сделать ещё один заказ? Нажмите /start 👇\n\n"
-        "✅ Payment received! Thank you!\n\n"
-        "The administrator will contact you soon.\n"
-        "💬 <b>All further work — revisions, clarifications, submission — will be done directly with the executor in private messages.</b>\n\n"
-        "Want another order? Press /start 👇"
-    ),
-    "waiting_for_receipt_prompt": (
-        "📎 Пожалуйста, отправьте **скриншот чека об оплате** в виде **фото или документа**.\n\n"
-        "Текст, голосовые, стикеры, аудио и другие форматы не принимаются.\n\n"
-        "📎 Please send **payment screenshot** as **photo or document**.\n\n"
-        "Text, voice, stickers, audio and other formats are not accepted."
-    ),
-    "receipt_received": (
-        "✅ Скриншот чека получен!\n\n"
-        "Администратор проверит оплату и скоро свяжется с вами.\n"
-        "💬 <b>Вся дальнейшая работа — правки, уточнения, сдача — будет вестись напрямую с исполнителем в личных сообщениях.</b>\n\n"
-        "Хотите сделать ещё один заказ? Нажмите /start 👇\n\n"
-        "✅ Payment screenshot received!\n\n"
-        "Admin will verify payment and contact you soon.\n"
-        "💬 <b>All further work — revisions, clarifications, submission — will be done directly with the executor in private messages.</b>\n\n"
-        "Want another order? Press /start 👇"
-    ),
-    "cancel_order": (
-        "Заказ отменён. Если хотите — начните заново командой /start.\n"
-        "Order cancelled. Start again with /start."
-    ),
-    "invalid_input": (
-        "Пожалуйста, используйте кнопки ниже.\n"
-        "Please use the buttons below."
-    ),
-    "invalid_days": (
-        "Пожалуйста, введите целое число дней (например: 1, 2, 3).\n"
-        "Please enter integer days (e.g.: 1, 2, 3)."
-    ),
-    "invalid_count": (
-        "Пожалуйста, введите целое количество заданий (например: 1, 2, 5).\n"
-        "Please enter integer number of tasks (e.g.: 1, 2, 5)."
-    ),
+# ========== ЛОКАЛИЗАЦИЯ ==========
+# Языковые пакеты лежат в LOCALES_DIR (<код>.json). Новый язык — это новый
+# файл с теми же ключами, код бота менять не нужно.
+def compile_locale(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Подготовка пакета: статические подстановки, шаблоны и клавиатуры собираются один раз"""
+    meta = data["meta"]
+    work_types = data["work_types"]
+    buttons = data["buttons"]
+
+    phrases = dict(data["phrases"])
+    price_list = "\n".join(
+        phrases["price_line"].format(name=work_types[t], rub=rub, eur=BASE_PRICES_EUR[t])
+        for t, rub in BASE_PRICES.items()
+    )
+    for key, text in phrases.items():
+        phrases[key] = (
+            text.replace("{emoji_primary}", EMOJI_PRIMARY)
+            .replace("{emoji_secondary}", EMOJI_SECONDARY)
+            .replace("{price_list}", price_list)
+        )
+
+    return {
+        "code": meta["code"],
+        "name": meta["name"],
+        "aliases": meta.get("aliases", []),
+        "currency": meta["currency"],
+        "work_types": work_types,
+        "bundles": data["bundles"],
+        "buttons": buttons,
+        "breakdown": {kind: template.format for kind, template in data["breakdown"].items()},
+        "phrases": phrases,
+        "types_keyboard": make_reply_markup(
+            [work_types[t] for t in BASE_PRICES], cancel_label=buttons["cancel_order"]
+        ),
+        "cancel_keyboard": ReplyKeyboardMarkup(
+            [[KeyboardButton(buttons["cancel_order"])]],
+            resize_keyboard=True
+        ),
+        "explain_keyboard": ReplyKeyboardMarkup(
+            [
+                [KeyboardButton(f"{EMOJI_PRIMARY} {buttons['yes']}"), KeyboardButton(f"{EMOJI_SECONDARY} {buttons['no']}")],
+                [KeyboardButton(buttons["cancel_order"])]
+            ],
+            resize_keyboard=True,
+            one_time_keyboard=True
+        ),
+        "confirm_keyboard": InlineKeyboardMarkup([
+            [InlineKeyboardButton(buttons["confirm"], callback_data="confirm_pay")],
+            [InlineKeyboardButton(buttons["add_item"], callback_data="add_item")],
+            [InlineKeyboardButton(buttons["cancel_inline"], callback_data="cancel")],
+        ]),
+    }
+
+def load_locales(path: str = LOCALES_DIR) -> Dict[str, Dict[str, Any]]:
+    """Загрузка и компиляция всех языковых пакетов"""
+    locales = {}
+    for filename in sorted(os.listdir(path)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(path, filename), encoding="utf-8") as f:
+            bundle = compile_locale(json.load(f))
+        locales[bundle["code"]] = bundle
+    for name, code in (("DEFAULT_LANG", DEFAULT_LANG), ("FALLBACK_LANG", FALLBACK_LANG)):
+        if code not in locales:
+            raise RuntimeError(f"Нет языкового пакета для {name}={code} в {path}")
+    logger.info(f"Загружены языки: {', '.join(locales)}")
+    return locales
+
+LOCALES = load_locales()
+
+# Код языка Telegram (и его псевдонимы) -> код пакета
+LANGUAGE_CODES = {
+    alias: code
+    for code, bundle in LOCALES.items()
+    for alias in [code, *bundle["aliases"]]
+}
+
+# Подписи кнопок всех языков -> тип работы, чтобы смена языка посреди заказа не ломала выбор
+WORK_TYPE_BY_LABEL = {
+    label: t
+    for bundle in LOCALES.values()
+    for t, label in bundle["work_types"].items()
 }
+YES_ANSWERS = {bundle["buttons"]["yes"].lower() for bundle in LOCALES.values()}
+NO_ANSWERS = {bundle["buttons"]["no"].lower() for bundle in LOCALES.values()}
+
+LANGUAGE_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton(bundle["name"], callback_data=f"lang:{code}")]
+    for code, bundle in LOCALES.items()
+])
+
+def get_lang(update: Update, context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Язык пользователя: явный выбор через /language, иначе language_code из Telegram"""
+    lang = context.user_data.get("lang")
+    if lang in LOCALES:
+        return lang
+    user = update.effective_user
+    code = (user.language_code or "").lower().split("-")[0] if user else ""
+    if not code:
+        return DEFAULT_LANG
+    return LANGUAGE_CODES.get(code, FALLBACK_LANG)
+
+def tr(lang: str, key: str, **kwargs) -> str:
+    text = LOCALES[lang]["phrases"][key]
+    return text.format(**kwargs) if kwargs else text
+
+def render_breakdown(lines: List[Dict[str, Any]], lang: str, currency: str = None) -> List[str]:
+    """Текст детализации на одном языке и в одной валюте (по умолчанию — валюта пакета)"""
+    bundle = LOCALES[lang]
+    currency = currency or bundle["currency"]
+    rendered = []
+    for line in lines:
+        if line["kind"] == "bundle_discount":
+            name = bundle["bundles"].get(line["bundle"], line["bundle"])
+        else:
+            name = bundle["work_types"].get(line.get("type"), line.get("type"))
+        rendered.append(bundle["breakdown"][line["kind"]](
+            name=name,
+            amount=line[currency],
+            unit=line.get(f"unit_{currency}"),
+            count=line.get("count"),
+            days=line.get("days"),
+            percent=line.get("percent"),
+            cur=CURRENCY_SYMBOLS[currency],
+        ))
+    return rendered
+
+def resolve_work_type(text: str) -> str:
+    clean = parse_choice_text(text)
+    if clean in WORK_TYPE_BY_LABEL:
+        return WORK_TYPE_BY_LABEL[clean]
+    # Кнопки старого формата: "Тип / Type"
+    if " / " in clean:
+        return WORK_TYPE_BY_LABEL.get(clean.split(" / ")[0].strip(), "")
+    return ""
+
+# ========== HTTP-КЛИЕНТ ==========
+# Статистика ожидания свободного соединения по пулам: имя пула -> счётчики
+REQUEST_STATS: Dict[str, Dict[str, Any]] = {}
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest с учётом времени ожидания слота в пуле соединений.
+
+    Слоты выдаёт собственный семафор размером с пул, поэтому httpx никогда не
+    ждёт соединения сам и всё ожидание видно в REQUEST_STATS.
+    """
+
+    def __init__(self, name: str, connection_pool_size: int, pool_timeout: float, **kwargs):
+        super().__init__(connection_pool_size=connection_pool_size, pool_timeout=pool_timeout, **kwargs)
+        self.name = name
+        self._slots = asyncio.Semaphore(connection_pool_size)
+        self._slot_timeout = pool_timeout
+        self.stats = REQUEST_STATS[name] = {
+            "pool_size": connection_pool_size,
+            "requests": 0,
+            "waited": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+            "pool_timeouts": 0,
+        }
+
+    async def do_request(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self._slot_timeout)
+        except asyncio.TimeoutError as exc:
+            self.stats["pool_timeouts"] += 1
+            raise TimedOut(f"Пул соединений «{self.name}» занят дольше {self._slot_timeout} с") from exc
+        wait = time.monotonic() - started
+        self.stats["requests"] += 1
+        self.stats["wait_total"] += wait
+        self.stats["wait_max"] = max(self.stats["wait_max"], wait)
+        if wait > 0.001:
+            self.stats["waited"] += 1
+        try:
+            return await super().do_request(*args, **kwargs)
+        finally:
+            self._slots.release()
+
+# TLS-контекст с корневыми сертификатами: загрузка занимает 30–45 мс, поэтому
+# он создаётся один раз на все пулы, а не в каждом httpx-клиенте
+_ssl_context = None
+
+def get_ssl_context():
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = httpx.create_ssl_context()
+    return _ssl_context
+
+def build_request(kind: str) -> InstrumentedRequest:
+    """Клиент Bot API с настройками пула HTTP_POOLS[kind]"""
+    config = HTTP_POOLS[kind]
+    http_version = "1.1"
+    if HTTP2:
+        if importlib.util.find_spec("h2"):
+            http_version = "2"
+        else:
+            logger.warning("HTTP2=1, но пакет h2 не установлен — используется HTTP/1.1")
+    return InstrumentedRequest(
+        name=kind,
+        connection_pool_size=config["pool_size"],
+        connect_timeout=config["connect_timeout"],
+        read_timeout=config["read_timeout"],
+        write_timeout=config["write_timeout"],
+        pool_timeout=config["pool_timeout"],
+        http_version=http_version,
+        httpx_kwargs={
+            "verify": get_ssl_context(),
+            "limits": httpx.Limits(
+                max_connections=config["pool_size"],
+                max_keepalive_connections=min(config["keepalive"], config["pool_size"]),
+                keepalive_expiry=config["keepalive_expiry"],
+            ),
+        },
+    )
+
+def format_request_stats() -> List[str]:
+    lines = []
+    for name, stats in REQUEST_STATS.items():
+        avg_ms = stats["wait_total"] / stats["requests"] * 1000 if stats["requests"] else 0.0
+        lines.append(
+            f"• {name} (пул {stats['pool_size']}): запросов {stats['requests']}, "
+            f"ждали слот {stats['waited']}, ожидание ср. {avg_ms:.1f} мс / макс. {stats['wait_max'] * 1000:.1f} мс, "
+            f"таймаутов пула {stats['pool_timeouts']}"
+        )
+    return lines
+
+# ========== ЗАЩИТА ОТ ФЛУДА ==========
+# user_id -> состояние; порядок — по последней активности, размер ограничен
+FLOOD_STATE: "collections.OrderedDict[int, Dict[str, Any]]" = collections.OrderedDict()
+FLOOD_STATS = {
+    "seen": 0,
+    "passed": 0,
+    "dropped_muted": 0,
+    "mutes": 0,
+    "invalid_replies_sent": 0,
+    "invalid_replies_suppressed": 0,
+    "evicted": 0,
+}
+
+def get_flood_state(user_id: int) -> Dict[str, Any]:
+    state = FLOOD_STATE.get(user_id)
+    if state is None:
+        state = FLOOD_STATE[user_id] = {
+            "hits": collections.deque(maxlen=FLOOD_MAX_UPDATES + 1),
+            "muted_until": 0.0,
+            "strikes": 0,
+            # media_group_id -> время первого сообщения альбома
+            "media_groups": {},
+            # ключ фразы об ошибке ввода -> время последнего ответа
+            "invalid_replies": {},
+        }
+        while len(FLOOD_STATE) > FLOOD_MAX_TRACKED_USERS:
+            FLOOD_STATE.popitem(last=False)
+            FLOOD_STATS["evicted"] += 1
+    else:
+        FLOOD_STATE.move_to_end(user_id)
+    return state
+
+def check_flood(user_id: int, now: float, media_group_id: str = None) -> str:
+    """Вердикт для очередного обновления: "pass", "muted" или "muted_now" (пауза только что началась)"""
+    state = get_flood_state(user_id)
+    if state["muted_until"] > now:
+        return "muted"
+    if state["strikes"] and now - state["muted_until"] > FLOOD_MUTE_MAX_SECONDS:
+        # Давняя пауза больше не влияет на длительность следующей
+        state["strikes"] = 0
+
+    if media_group_id:
+        groups = state["media_groups"]
+        for group_id, first_seen in list(groups.items()):
+            if first_seen <= now - FLOOD_WINDOW_SECONDS:
+                del groups[group_id]
+        # Остальные сообщения альбома, уже учтённого в окне, не считаются
+        if media_group_id in groups:
+            return "pass"
+        groups[media_group_id] = now
+
+    hits = state["hits"]
+    hits.append(now)
+    while hits and hits[0] <= now - FLOOD_WINDOW_SECONDS:
+        hits.popleft()
+    if len(hits) > FLOOD_MAX_UPDATES:
+        state["strikes"] += 1
+        state["muted_until"] = now + min(FLOOD_MUTE_SECONDS * 2 ** (state["strikes"] - 1), FLOOD_MUTE_MAX_SECONDS)
+        hits.clear()
+        return "muted_now"
+    return "pass"
+
+async def flood_guard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Срабатывает раньше ConversationHandler и отбрасывает обновления флудящих пользователей"""
+    user = update.effective_user
+    # Платежи и служебные обновления не ограничиваем
+    if user is None or update.pre_checkout_query or (update.message and update.message.successful_payment):
+        return
+    if update.effective_chat and update.effective_chat.id == ADMIN_CHAT_ID:
+        return
+
+    FLOOD_STATS["seen"] += 1
+    now = time.monotonic()
+    message = update.effective_message
+    verdict = check_flood(user.id, now, message.media_group_id if message else None)
+    if verdict == "pass":
+        FLOOD_STATS["passed"] += 1
+        return
+
+    FLOOD_STATS["dropped_muted"] += 1
+    if verdict == "muted_now":
+        FLOOD_STATS["mutes"] += 1
+        seconds = int(FLOOD_STATE[user.id]["muted_until"] - now)
+        logger.warning(f"Флуд от {user.id} (@{user.username}): пауза {seconds} с")
+        if message:
+            try:
+                await message.reply_text(
+                    tr(get_lang(update, context), "flood_muted", seconds=seconds)
+                )
+            except TelegramError as e:
+                logger.error(f"❌ Не удалось предупредить о флуде {user.id}: {e}")
+    if update.callback_query:
+        # Иначе у клиента так и будет крутиться индикатор загрузки на кнопке
+        try:
+            await update.callback_query.answer()
+        except TelegramError:
+            pass
+    raise ApplicationHandlerStop
+
+async def reply_invalid(update: Update, context: ContextTypes.DEFAULT_TYPE, key: str) -> None:
+    """Ответ на некорректный ввод — одна и та же фраза не чаще раза за FLOOD_WINDOW_SECONDS"""
+    replies = get_flood_state(update.effective_user.id)["invalid_replies"]
+    now = time.monotonic()
+    if now - replies.get(key, 0.0) < FLOOD_WINDOW_SECONDS:
+        FLOOD_STATS["invalid_replies_suppressed"] += 1
+        return
+    replies[key] = now
+    FLOOD_STATS["invalid_replies_sent"] += 1
+    await update.message.reply_text(tr(get_lang(update, context), key))
+
+def format_flood_stats() -> List[str]:
+    return [
+        f"• обновлений проверено: {FLOOD_STATS['seen']}, пропущено: {FLOOD_STATS['passed']}",
+        f"• отброшено на паузе: {FLOOD_STATS['dropped_muted']}, пауз назначено: {FLOOD_STATS['mutes']}",
+        f"• ответов на ошибки ввода: {FLOOD_STATS['invalid_replies_sent']}, "
+        f"подавлено: {FLOOD_STATS['invalid_replies_suppressed']}",
+        f"• пользователей в памяти: {len(FLOOD_STATE)} (вытеснено: {FLOOD_STATS['evicted']})",
+    ]
 
 # ========== ОБРАБОТЧИКИ ==========
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -320,18 +525,32 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     logger.info(f"Команда /start от {update.effective_user.username}")
-    context.user_data.clear()
+    lang = get_lang(update, context)
+    reset_user_data(context)
     context.user_data["order"] = {}
-    await update.message.reply_html(PHRASES["start_welcome"])
-    types = list(BASE_PRICES.keys())
-    await update.message.reply_text(PHRASES["start_types"], reply_markup=make_reply_markup(types))
+    await update.message.reply_html(tr(lang, "start_welcome"))
+    await update.message.reply_text(tr(lang, "start_types"), reply_markup=LOCALES[lang]["types_keyboard"])
     return TYPE_CHOICE
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    context.user_data.clear()
-    await update.message.reply_text(PHRASES["cancel_order"])
+    lang = get_lang(update, context)
+    reset_user_data(context)
+    await update.message.reply_text(tr(lang, "cancel_order"))
     return ConversationHandler.END
 
+async def language_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    lang = get_lang(update, context)
+    await update.message.reply_text(tr(lang, "language_prompt"), reply_markup=LANGUAGE_KEYBOARD)
+
+async def language_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = update.callback_query
+    await query.answer()
+    lang = query.data.split(":", 1)[1]
+    if lang not in LOCALES:
+        return
+    context.user_data["lang"] = lang
+    await query.edit_message_text(tr(lang, "language_set", name=LOCALES[lang]["name"]))
+
 async def type_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user_text = update.message.text
     logger.info(f"Пользователь выбрал: {user_text}")
@@ -339,30 +558,28 @@ async def type_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
     if "отмен" in user_text.lower() or "❌" in user_text:
         return await cancel(update, context)
     
-    text = parse_choice_text(user_text)
+    lang = get_lang(update, context)
+    text = resolve_work_type(user_text)
     
     if text not in BASE_PRICES:
-        logger.warning(f"Неизвестный тип: {text}")
-        await update.message.reply_text(PHRASES["invalid_input"])
+        logger.warning(f"Неизвестный тип: {user_text}")
+        await reply_invalid(update, context, "invalid_input")
         return TYPE_CHOICE
     
     context.user_data["order"]["type"] = text
-    en_text = WORK_TYPES_TRANSLATIONS.get(text, text)
     
     await update.message.reply_text(
-        PHRASES["type_chosen"].format(ru=text, en=en_text),
-        reply_markup=ReplyKeyboardMarkup(
-            [[KeyboardButton("❌ Отменить заказ / Cancel order")]], 
-            resize_keyboard=True
-        ),
+        tr(lang, "type_chosen", type=LOCALES[lang]["work_types"][text]),
+        reply_markup=LOCALES[lang]["cancel_keyboard"],
         parse_mode="HTML"
     )
     
-    await update.message.reply_text(PHRASES["send_file_prompt"], parse_mode="HTML")
+    await update.message.reply_text(tr(lang, "send_file_prompt"), parse_mode="HTML")
     return SEND_FILE
 
 async def send_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user = update.effective_user
+    lang = get_lang(update, context)
     
     if update.message.text and ("отмен" in update.message.text.lower() or "❌" in update.message.text):
         return await cancel(update, context)
@@ -378,7 +595,7 @@ async def send_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             "caption": caption_text,
             "full_caption": f"📩 Задание от {user.full_name} (@{user.username} | id={user.id})\n\n📝 Подпись: {caption_text}" if caption_text else f"📩 Задание от {user.full_name} (@{user.username} | id={user.id})"
         }
-        await update.message.reply_text(PHRASES["file_received"])
+        await update.message.reply_text(tr(lang, "file_received"))
         
     elif update.message.photo:
         file_id = update.message.photo[-1].file_id
@@ -391,7 +608,7 @@ async def send_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             "caption": caption_text,
             "full_caption": f"📩 Задание от {user.full_name} (@{user.username} | id={user.id})\n\n📝 Подпись: {caption_text}" if caption_text else f"📩 Задание от {user.full_name} (@{user.username} | id={user.id})"
         }
-        await update.message.reply_text(PHRASES["photo_received"])
+        await update.message.reply_text(tr(lang, "photo_received"))
         
     elif update.message.text:
         # Проверка на отмену
@@ -404,38 +621,32 @@ async def send_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             "content": update.message.text,
             "full_caption": f"📩 Задание от {user.full_name} (@{user.username} | id={user.id}):\n\n{update.message.text}"
         }
-        await update.message.reply_text(PHRASES["text_received"])
+        await update.message.reply_text(tr(lang, "text_received"))
     else:
-        await update.message.reply_text(PHRASES["send_file_error"])
+        await reply_invalid(update, context, "send_file_error")
         return SEND_FILE
 
-    kb = ReplyKeyboardMarkup(
-        [
-            [KeyboardButton(f"{EMOJI_PRIMARY} Да / Yes"), KeyboardButton(f"{EMOJI_SECONDARY} Нет / No")],
-            [KeyboardButton("❌ Отменить заказ / Cancel order")]
-        ],
-        resize_keyboard=True, 
-        one_time_keyboard=True
-    )
-    await update.message.reply_text(PHRASES["explain_prompt"], reply_markup=kb)
+    await update.message.reply_text(tr(lang, "explain_prompt"), reply_markup=LOCALES[lang]["explain_keyboard"])
     return EXPLAIN_CHOICE
 
 async def explain_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     if "отмен" in update.message.text.lower() or "❌" in update.message.text:
         return await cancel(update, context)
     
+    lang = get_lang(update, context)
     text = update.message.text.lower()
-    if "да" in text or "yes" in text:
+    answer = parse_choice_text(text)
+    if answer in YES_ANSWERS or "да" in text or "yes" in text:
         context.user_data["order"]["explain"] = True
-        await update.message.reply_text(PHRASES["explain_yes"])
-    elif "нет" in text or "no" in text:
+        await update.message.reply_text(tr(lang, "explain_yes"))
+    elif answer in NO_ANSWERS or "нет" in text or "no" in text:
         context.user_data["order"]["explain"] = False
-        await update.message.reply_text(PHRASES["explain_no"])
+        await update.message.reply_text(tr(lang, "explain_no"))
     else:
-        await update.message.reply_text(PHRASES["explain_error"])
+        await reply_invalid(update, context, "explain_error")
         return EXPLAIN_CHOICE
     
-    await update.message.reply_text(PHRASES["deadline_prompt"])
+    await update.message.reply_text(tr(lang, "deadline_prompt"))
     return DEADLINE_CHOICE
 
 async def deadline_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -448,11 +659,11 @@ async def deadline_choice(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             raise ValueError
         context.user_data["order"]["days"] = days
     except (ValueError, AttributeError):
-        await update.message.reply_text(PHRASES["invalid_days"])
+        await reply_invalid(update, context, "invalid_days")
         return DEADLINE_CHOICE
 
-    if context.user_data["order"]["type"] in ("Задание", "Лабораторная/Контрольная", "Экзаменационный вопрос"):
-        await update.message.reply_text(PHRASES["extra_params_prompt"])
+    if context.user_data["order"]["type"] in ITEMIZED_TYPES:
+        await update.message.reply_text(tr(get_lang(update, context), "extra_params_prompt"))
         return EXTRA_PARAMS
     else:
         return await show_confirmation(update, context)
@@ -467,46 +678,82 @@ async def extra_params(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
             raise ValueError
         context.user_data["order"]["extra_count"] = count
     except (ValueError, AttributeError):
-        await update.message.reply_text(PHRASES["invalid_count"])
+        await reply_invalid(update, context, "invalid_count")
         return EXTRA_PARAMS
     
     return await show_confirmation(update, context)
 
+def format_cart_summary(items: List[Dict[str, Any]], cart_calc: Dict[str, Any], lang: str) -> str:
+    """Сводка заказа из нескольких позиций"""
+    bundle = LOCALES[lang]
+    item_blocks = []
+    for index, (item, calc) in enumerate(zip(items, cart_calc["items"]), start=1):
+        extra_count_line = ""
+        if item.get("type") in ITEMIZED_TYPES:
+            extra_count_line = tr(lang, "extra_count_line", count=item.get("extra_count", 1))
+        item_blocks.append(tr(
+            lang, "cart_item_summary",
+            index=index,
+            type=bundle["work_types"][item['type']],
+            explain=bundle["buttons"]["yes"] if item.get('explain') else bundle["buttons"]["no"],
+            days=item['days'],
+            extra_count_line=extra_count_line,
+            breakdown="\n".join(render_breakdown(calc["lines"], lang)),
+            total_rub=calc["total_rub"],
+            total_eur=calc["total_eur"],
+        ))
+
+    discount_block = ""
+    if cart_calc["discounts"]:
+        discount_block = tr(
+            lang, "cart_discount_block",
+            breakdown="\n".join(render_breakdown(cart_calc["discounts"], lang)),
+        )
+
+    return tr(
+        lang, "cart_summary",
+        count=len(items),
+        items="".join(item_blocks),
+        discount_block=discount_block,
+        total_rub=cart_calc["total_rub"],
+        total_eur=cart_calc["total_eur"],
+    )
+
 async def show_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    lang = get_lang(update, context)
+    bundle = LOCALES[lang]
     order = context.user_data.get("order", {})
     
     if "extra_count" not in order:
         order["extra_count"] = 1
 
-    calc = calculate_price(order)
-    total_rub = calc["total_rub"]
-    total_eur = calc["total_eur"]
-    breakdown_rub = "\n".join(calc["breakdown_rub"])
-    breakdown_eur = "\n".join(calc["breakdown_eur"])
-
-    extra_count_line = ""
-    if order.get("type") in ("Задание", "Лабораторная/Контрольная", "Экзаменационный вопрос"):
-        extra_count_line = f"Количество заданий / Quantity: {order['extra_count']}\n"
-
-    summary_text = PHRASES["confirmation_summary"].format(
-        type=order['type'],
-        explain="Да" if order.get('explain') else "Нет",
-        days=order['days'],
-        extra_count_line=extra_count_line,
-        breakdown_rub=breakdown_rub,
-        breakdown_eur=breakdown_eur,
-        total_rub=total_rub,
-        total_eur=total_eur
-    )
+    items = get_cart_items(context)
+    if len(items) > 1:
+        summary_text = format_cart_summary(items, calculate_cart_price(items), lang)
+    else:
+        calc = calculate_price(order)
+        total_rub = calc["total_rub"]
+        total_eur = calc["total_eur"]
+        breakdown = "\n".join(render_breakdown(calc["lines"], lang))
 
-    buttons = [
-        [InlineKeyboardButton(PHRASES["confirm_button"], callback_data="confirm_pay")],
-        [InlineKeyboardButton(PHRASES["cancel_button"], callback_data="cancel")],
-    ]
+        extra_count_line = ""
+        if order.get("type") in ITEMIZED_TYPES:
+            extra_count_line = tr(lang, "extra_count_line", count=order['extra_count'])
+
+        summary_text = tr(
+            lang, "confirmation_summary",
+            type=bundle["work_types"][order['type']],
+            explain=bundle["buttons"]["yes"] if order.get('explain') else bundle["buttons"]["no"],
+            days=order['days'],
+            extra_count_line=extra_count_line,
+            breakdown=breakdown,
+            total_rub=total_rub,
+            total_eur=total_eur
+        )
     
     await update.message.reply_html(
         summary_text, 
-        reply_markup=InlineKeyboardMarkup(buttons)
+        reply_markup=bundle["confirm_keyboard"]
     )
     
     return CONFIRM_ORDER
@@ -514,55 +761,96 @@ async def show_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
+    lang = get_lang(update, context)
+    bundle = LOCALES[lang]
     
     if query.data == "cancel":
-        context.user_data.clear()
-        await query.edit_message_text(PHRASES["cancel_order"])
+        reset_user_data(context)
+        await query.edit_message_text(tr(lang, "cancel_order"))
         return ConversationHandler.END
 
-    order = context.user_data.get("order", {})
-    calc = calculate_price(order)
-    total_rub = calc["total_rub"]
-    total_eur = calc["total_eur"]
-    
+    if query.data == "add_item":
+        # Текущая позиция уходит в корзину, выбор следующей начинается заново
+        context.user_data.setdefault("cart", []).append(context.user_data.get("order", {}))
+        context.user_data["order"] = {}
+        await query.edit_message_reply_markup(reply_markup=None)
+        await query.message.reply_text(
+            f"{tr(lang, 'add_item_prompt')}\n\n{tr(lang, 'start_types')}",
+            reply_markup=bundle["types_keyboard"]
+        )
+        return TYPE_CHOICE
+
+    items = get_cart_items(context)
+    cart_calc = calculate_cart_price(items)
+    total_rub = cart_calc["total_rub"]
+    total_eur = cart_calc["total_eur"]
+
     # НЕ уведомляем админа на этом этапе
-    
+
     provider_token = PAYMENTS_PROVIDER_TOKEN.strip()
     if provider_token:
+        if len(items) > 1:
+            prices = [
+                LabeledPrice(label=bundle["work_types"][item["type"]], amount=int(calc["total_rub"]) * 100)
+                for item, calc in zip(items, cart_calc["items"])
+            ]
+            if cart_calc["discount_rub"]:
+                prices.append(LabeledPrice(
+                    label=tr(lang, "invoice_discount_label"),
+                    amount=-int(cart_calc["discount_rub"]) * 100
+                ))
+            payload = f"order_{update.effective_user.id}_cart{len(items)}"
+        else:
+            prices = [LabeledPrice(label=tr(lang, "invoice_total_label"), amount=int(total_rub) * 100)]
+            payload = f"order_{update.effective_user.id}_{items[0].get('type')}"
+        types_text = ", ".join(bundle["work_types"][item["type"]] for item in items)
         try:
             await context.bot.send_invoice(
                 chat_id=update.effective_chat.id,
-                title="Оплата заказа — Решу бот",
-                description=f"{order.get('type')} — оплата услуги",
-                payload=f"order_{update.effective_user.id}_{order.get('type')}",
+                title=tr(lang, "invoice_title"),
+                description=tr(lang, "invoice_description", types=types_text)[:255],
+                payload=payload,
                 provider_token=provider_token,
                 currency=CURRENCY,
-                prices=[LabeledPrice(label="Итого", amount=int(total_rub) * 100)],
+                prices=prices,
                 start_parameter="pay_reshemu",
             )
-            await query.edit_message_text("Счёт отправлен. Пожалуйста, оплатите через окно оплаты Telegram.")
+            await query.edit_message_text(tr(lang, "invoice_sent"))
             return PAYMENT
         except Exception as e:
             logger.exception("Ошибка отправки инвойса")
 
-    payment_text = PHRASES["payment_prompt"].format(
+    payment_text = tr(
+        lang, "payment_prompt",
         total_rub=total_rub,
         total_eur=total_eur
     )
     await query.edit_message_text(payment_text, parse_mode="HTML")
     return WAITING_FOR_RECEIPT
 
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Служебная статистика — только для администратора"""
+    if update.effective_chat.id != ADMIN_CHAT_ID:
+        return
+    lines = ["📊 <b>Статистика</b>", "", "<b>HTTP-пулы Bot API:</b>"]
+    lines.extend(format_request_stats() or ["• запросов ещё не было"])
+    lines.extend(["", "<b>Защита от флуда:</b>"])
+    lines.extend(format_flood_stats())
+    await update.message.reply_html("\n".join(lines))
+
 async def precheckout_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.pre_checkout_query.answer(ok=True)
 
 async def successful_payment_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обработка успешной оплаты через Telegram Payments"""
     user = update.effective_user
-    order = context.user_data.get("order", {})
-    calc = calculate_price(order)
+    lang = get_lang(update, context)
+    items = get_cart_items(context)
+    cart_calc = calculate_cart_price(items)
     
     # ОТПРАВЛЯЕМ админу ВСЮ информацию ОДНИМ сообщением
-    await send_complete_notification_to_admin(context, user, order, calc, payment_method="telegram_payments")
+    await send_complete_notification_to_admin(context, user, items, cart_calc, lang, payment_method="telegram_payments")
+    record_deadlines(user, items, lang)
 
     keyboard = [[KeyboardButton("/start")]]
     reply_markup = ReplyKeyboardMarkup(
@@ -572,17 +860,18 @@ async def successful_payment_handler(update: Update, context: ContextTypes.DEFAU
     )
     
     await update.message.reply_text(
-        PHRASES["successful_payment"], 
+        tr(lang, "successful_payment"), 
         reply_markup=reply_markup, 
         parse_mode="HTML"
     )
     
-    context.user_data.clear()
+    reset_user_data(context)
     return ConversationHandler.END
 
 async def waiting_for_receipt(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Обработка скриншота чека для ручной оплаты"""
     user = update.effective_user
+    lang = get_lang(update, context)
     
     if update.message.photo or update.message.document:
         # Сохраняем информацию о чеке
@@ -593,18 +882,22 @@ async def waiting_for_receipt(update: Update, context: ContextTypes.DEFAULT_TYPE
             receipt_file_id = update.message.document.file_id
             receipt_type = "document"
         
-        # Сохраняем в user_data
-        context.user_data["order"]["receipt"] = {
+        # Чек один на весь заказ, а не на отдельную позицию
+        receipt = {
             "type": receipt_type,
             "file_id": receipt_file_id,
             "caption": f"📸 Чек от {user.full_name} (@{user.username} | id={user.id})"
         }
         
-        order = context.user_data.get("order", {})
-        if order:
-            calc = calculate_price(order)
+        items = get_cart_items(context)
+        if items:
+            cart_calc = calculate_cart_price(items)
             # ОТПРАВЛЯЕМ админу ВСЮ информацию ОДНИМ сообщением
-            await send_complete_notification_to_admin(context, user, order, calc, payment_method="manual")
+            await send_complete_notification_to_admin(
+                context, user, items, cart_calc, lang, receipt=receipt, payment_method="manual"
+            )
+            # Срок выполнения начинается с момента получения чека
+            record_deadlines(user, items, lang)
 
         keyboard = [[KeyboardButton("/start")]]
         reply_markup = ReplyKeyboardMarkup(
@@ -614,23 +907,23 @@ async def waiting_for_receipt(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         
         await update.message.reply_text(
-            PHRASES["receipt_received"], 
+            tr(lang, "receipt_received"), 
             reply_markup=reply_markup, 
             parse_mode="HTML"
         )
 
-        context.user_data.clear()
+        reset_user_data(context)
         return ConversationHandler.END
 
-    await update.message.reply_text(PHRASES["waiting_for_receipt_prompt"])
+    await reply_invalid(update, context, "waiting_for_receipt_prompt")
     return WAITING_FOR_RECEIPT
 
-async def send_complete_notification_to_admin(context, user, order, calc, payment_method="manual"):
-    """Отправка полной информации администратору одним сообщением"""
+async def send_complete_notification_to_admin(context, user, items, cart_calc, lang=DEFAULT_LANG, receipt=None, payment_method="manual"):
+    """Отправка полной информации администратору одним сообщением (всегда на ADMIN_LANG)"""
     try:
-        # 1. Сначала отправляем задание (если есть файл/фото)
-        assignment = order.get("assignment", {})
-        if assignment:
+        # 1. Сначала отправляем задания всех позиций (если есть файл/фото)
+        for item in items:
+            assignment = item.get("assignment", {})
             if assignment.get("type") == "document":
                 await context.bot.send_document(
                     ADMIN_CHAT_ID, 
@@ -650,7 +943,6 @@ async def send_complete_notification_to_admin(context, user, order, calc, paymen
                 )
         
         # 2. Отправляем чек (если есть)
-        receipt = order.get("receipt", {})
         if receipt:
             if receipt.get("type") == "photo":
                 await context.bot.send_photo(
@@ -665,7 +957,7 @@ async def send_complete_notification_to_admin(context, user, order, calc, paymen
                     caption=receipt["caption"]
                 )
         
-        # 3. Отправляем детали заказа одним сообщением
+        # 3. Отправляем детали всего заказа одним сообщением
         lines = [
             "=" * 40,
             "🎉 <b>НОВЫЙ ОПЛАЧЕННЫЙ ЗАКАЗ</b> 🎉",
@@ -675,38 +967,54 @@ async def send_complete_notification_to_admin(context, user, order, calc, paymen
             f"• Имя: {user.full_name}",
             f"• Username: @{user.username}" if user.username else "• Username: не указан",
             f"• ID: {user.id}",
-            "",
-            "<b>📋 Детали заказа:</b>",
-            f"• Тип: {order.get('type')}",
-            f"• Объяснения: {'ДА ✅' if order.get('explain') else 'НЕТ ❌'}",
-            f"• Срок: {order.get('days')} дней",
+            f"• Язык: {LOCALES[lang]['name']}",
         ]
         
-        if order.get("type") in ("Задание", "Лабораторная/Контрольная", "Экзаменационный вопрос"):
-            lines.append(f"• Количество заданий: {order.get('extra_count')}")
-        
-        lines.extend([
-            "",
-            "<b>💰 Стоимость:</b>",
-            "<i>Рубли:</i>"
-        ])
-        
-        # Добавляем детализацию в рублях
-        for line in calc["breakdown_rub"]:
-            lines.append(f"  {line}")
-        
-        lines.extend([
-            f"  <b>Итого: {calc['total_rub']}₽</b>",
-            "",
-            "<i>Евро:</i>"
-        ])
+        for index, (item, calc) in enumerate(zip(items, cart_calc["items"]), start=1):
+            title = "<b>📋 Детали заказа:</b>" if len(items) == 1 else f"<b>📋 Позиция {index} из {len(items)}:</b>"
+            lines.extend([
+                "",
+                title,
+                f"• Тип: {item.get('type')}",
+                f"• Объяснения: {'ДА ✅' if item.get('explain') else 'НЕТ ❌'}",
+                f"• Срок: {item.get('days')} дней",
+            ])
+            
+            if item.get("type") in ITEMIZED_TYPES:
+                lines.append(f"• Количество заданий: {item.get('extra_count')}")
+            
+            lines.extend([
+                "",
+                "<b>💰 Стоимость:</b>",
+                "<i>Рубли:</i>"
+            ])
+            
+            # Добавляем детализацию в рублях
+            for line in render_breakdown(calc["lines"], ADMIN_LANG, "rub"):
+                lines.append(f"  {line}")
+            
+            lines.extend([
+                f"  <b>Итого: {calc['total_rub']}₽</b>",
+                "",
+                "<i>Евро:</i>"
+            ])
+            
+            # Добавляем детализацию в евро
+            for line in render_breakdown(calc["lines"], ADMIN_LANG, "eur"):
+                lines.append(f"  {line}")
+            
+            lines.append(f"  <b>Итого: {calc['total_eur']}€</b>")
         
-        # Добавляем детализацию в евро
-        for line in calc["breakdown_eur"]:
-            lines.append(f"  {line}")
+        if len(items) > 1:
+            lines.extend([
+                "",
+                "<b>🧾 Весь заказ:</b>",
+            ])
+            for line in render_breakdown(cart_calc["discounts"], ADMIN_LANG, "rub"):
+                lines.append(f"  {line}")
+            lines.append(f"  <b>Итого к оплате: {cart_calc['total_rub']}₽ / {cart_calc['total_eur']}€</b>")
         
         lines.extend([
-            f"  <b>Итого: {calc['total_eur']}€</b>",
             "",
             "<b>💳 Способ оплаты:</b>",
             f"• {'Telegram Payments' if payment_method == 'telegram_payments' else 'Ручной перевод'}",
@@ -717,8 +1025,6 @@ async def send_complete_notification_to_admin(context, user, order, calc, paymen
             "=" * 40,
         ])
         
-        text = "\n".join(lines)
-        
         # Создаем кнопку для связи с клиентом
         keyboard = []
         if user.username:
@@ -729,34 +1035,284 @@ async def send_complete_notification_to_admin(context, user, order, calc, paymen
                 )
             ])
         
-        # Отправляем общее сообщение
-        await context.bot.send_message(
-            ADMIN_CHAT_ID,
-            text=text,
-            parse_mode="HTML",
-            reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None
-        )
+        # Отправляем общее сообщение; большая корзина не влезает в лимит Telegram —
+        # делим по строкам, кнопка остаётся под последней частью
+        chunks = split_message(lines)
+        for i, text in enumerate(chunks, start=1):
+            await context.bot.send_message(
+                ADMIN_CHAT_ID,
+                text=text,
+                parse_mode="HTML",
+                reply_markup=InlineKeyboardMarkup(keyboard) if keyboard and i == len(chunks) else None
+            )
         
         logger.info(f"✅ Полное уведомление отправлено администратору от {user.full_name}")
         
     except Exception as e:
         logger.error(f"❌ Ошибка отправки уведомления админу: {e}")
 
-# ========== ЗАПУСК ==========
-def main() -> None:
-    """Главная функция запуска бота"""
-    logger.info("=" * 50)
-    logger.info("ЗАПУСК ТЕЛЕГРАМ БОТА")
-    logger.info(f"Токен: {'***' + TOKEN[-4:] if TOKEN else 'НЕ УСТАНОВЛЕН'}")
-    logger.info(f"Admin ID: {ADMIN_CHAT_ID}")
-    logger.info("=" * 50)
+# ========== ДЕДЛАЙНЫ ==========
+# Открытые заказы хранятся в SQLite и в памяти: DEADLINES (id -> запись) и куча
+# DEADLINE_HEAP с ближайшим напоминанием каждого заказа (fire_at, id, offset_index).
+# Одна фоновая задача раз в REMINDER_TICK_SECONDS снимает с кучи всё, что наступило,
+# и отправляет напоминания пачкой — без отдельной задачи на каждый заказ.
+DEADLINES: Dict[int, Dict[str, Any]] = {}
+DEADLINE_HEAP: List[tuple] = []
+_deadlines_db = None
 
-    if not TOKEN:
-        logger.error("❌ Токен бота не установлен!")
-        logger.error("Добавьте переменную окружения TG_BOT_TOKEN в Bothost")
+def get_deadlines_db() -> sqlite3.Connection:
+    global _deadlines_db
+    if _deadlines_db is None:
+        _deadlines_db = sqlite3.connect(DEADLINES_DB)
+        _deadlines_db.row_factory = sqlite3.Row
+        _deadlines_db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deadlines (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                username TEXT,
+                full_name TEXT,
+                lang TEXT,
+                work_type TEXT NOT NULL,
+                days INTEGER NOT NULL,
+                paid_at REAL NOT NULL,
+                due_at REAL NOT NULL,
+                reminders_sent INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        _deadlines_db.commit()
+    return _deadlines_db
+
+def next_reminder_index(deadline: Dict[str, Any], now: float) -> int:
+    """Индекс следующего напоминания; пропущенные (например, во время простоя) схлопываются в последнее"""
+    index = deadline["reminders_sent"]
+    due_at = deadline["due_at"]
+    while (
+        index + 1 < len(REMINDER_OFFSETS_HOURS)
+        and due_at - REMINDER_OFFSETS_HOURS[index + 1] * 3600 <= now
+    ):
+        index += 1
+    return index
+
+def schedule_deadline(deadline: Dict[str, Any], now: float) -> None:
+    index = next_reminder_index(deadline, now)
+    fire_at = deadline["due_at"] - REMINDER_OFFSETS_HOURS[index] * 3600
+    heapq.heappush(DEADLINE_HEAP, (fire_at, deadline["id"], index))
+
+def record_deadlines(user, items: List[Dict[str, Any]], lang: str) -> None:
+    """Сохранение сроков оплаченного заказа: по записи на каждую позицию"""
+    if not REMINDER_OFFSETS_HOURS:
+        return
+    try:
+        db = get_deadlines_db()
+        paid_at = time.time()
+        for item in items:
+            due_at = paid_at + int(item.get("days", 0)) * 86400
+            # Отступы, которые к моменту оплаты уже наступили (например, «за 24 ч» для
+            # заказа на 1 день), считаются отправленными — иначе они сработают сразу
+            first_index = next(
+                (i for i, hours in enumerate(REMINDER_OFFSETS_HOURS) if due_at - hours * 3600 > paid_at),
+                None
+            )
+            if first_index is None:
+                continue
+            deadline = {
+                "user_id": user.id,
+                "username": user.username,
+                "full_name": user.full_name,
+                "lang": lang,
+                "work_type": item["type"],
+                "days": int(item.get("days", 0)),
+                "paid_at": paid_at,
+                "due_at": due_at,
+                "reminders_sent": first_index,
+            }
+            cursor = db.execute(
+                "INSERT INTO deadlines (user_id, username, full_name, lang, work_type, days, paid_at, due_at, reminders_sent) "
+                "VALUES (:user_id, :username, :full_name, :lang, :work_type, :days, :paid_at, :due_at, :reminders_sent)",
+                deadline
+            )
+            deadline["id"] = cursor.lastrowid
+            DEADLINES[deadline["id"]] = deadline
+            schedule_deadline(deadline, paid_at)
+        db.commit()
+    except Exception as e:
+        logger.error(f"❌ Ошибка сохранения сроков заказа: {e}")
+
+def read_deadlines() -> List[Dict[str, Any]]:
+    """Чтение открытых заказов отдельным соединением — безопасно вызывать из рабочего потока"""
+    db = sqlite3.connect(DEADLINES_DB)
+    db.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in db.execute("SELECT * FROM deadlines")]
+    finally:
+        db.close()
+
+async def rehydrate_deadlines() -> None:
+    """Восстановление открытых заказов из базы после перезапуска.
+
+    Чтение идёт в рабочем потоке и не блокирует цикл событий; заказы, оплаченные
+    за это время, уже есть в DEADLINES и не дублируются.
+    """
+    if not REMINDER_OFFSETS_HOURS:
         return
+    get_deadlines_db()  # создаёт таблицу при первом запуске
+    rows = await asyncio.to_thread(read_deadlines)
+    now = time.time()
+    for deadline in rows:
+        if deadline["id"] in DEADLINES:
+            continue
+        DEADLINES[deadline["id"]] = deadline
+        # Записи, для которых по текущим настройкам напоминаний не осталось, дочищаются на первом тике
+        deadline["reminders_sent"] = min(deadline["reminders_sent"], len(REMINDER_OFFSETS_HOURS) - 1)
+        schedule_deadline(deadline, now)
+    logger.info(f"Восстановлено открытых заказов со сроками: {len(DEADLINES)}")
+
+def split_lines(lines: List[str], limit: int = 4000) -> List[List[str]]:
+    """Группировка строк в части, каждая из которых влезает в одно сообщение Telegram"""
+    chunks = []
+    current = []
+    size = 0
+    for line in lines:
+        if current and size + len(line) + 1 > limit:
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append(current)
+    return chunks
 
-    app = ApplicationBuilder().token(TOKEN).build()
+def split_message(lines: List[str], limit: int = 4000) -> List[str]:
+    """Разбиение списка строк на сообщения не длиннее лимита Telegram"""
+    return ["\n".join(chunk) for chunk in split_lines(lines, limit)]
+
+async def process_due_reminders(bot, now: float = None) -> int:
+    """Отправка всех наступивших напоминаний: одно сообщение админу, по одному каждому клиенту"""
+    now = time.time() if now is None else now
+    due = []
+    while DEADLINE_HEAP and DEADLINE_HEAP[0][0] <= now:
+        fire_at, deadline_id, index = heapq.heappop(DEADLINE_HEAP)
+        deadline = DEADLINES.get(deadline_id)
+        if deadline is not None:
+            due.append((fire_at, deadline, max(index, next_reminder_index(deadline, now))))
+    if not due:
+        return 0
+
+    admin_header = ["⏰ <b>НАПОМИНАНИЕ О СРОКАХ</b>", ""]
+    admin_lines = list(admin_header)
+    for _, deadline, index in due:
+        due_text = time.strftime("%d.%m.%Y %H:%M", time.localtime(deadline["due_at"]))
+        # Фактический остаток, а не настроенный отступ: после простоя они расходятся
+        seconds_left = deadline["due_at"] - now
+        if seconds_left <= 0:
+            left = "⚠️ срок наступил"
+        elif seconds_left < 3600:
+            left = f"осталось ~{max(int(seconds_left // 60), 1)} мин"
+        else:
+            left = f"осталось ~{seconds_left / 3600:.0f} ч"
+        username = f"@{deadline['username']}" if deadline["username"] else f"id={deadline['user_id']}"
+        admin_lines.append(
+            f"• #{deadline['id']} {deadline['work_type']} — {deadline['full_name']} ({username}) — до {due_text} ({left})"
+        )
+
+    # Строки админу идут в том же порядке, что и due: по числу доставленных строк
+    # понятно, какие напоминания ушли
+    delivered_lines = 0
+    try:
+        for chunk in split_lines(admin_lines):
+            await bot.send_message(ADMIN_CHAT_ID, text="\n".join(chunk), parse_mode="HTML")
+            delivered_lines += len(chunk)
+    except TelegramError as e:
+        # Недоставленные напоминания возвращаются в кучу без изменений и уйдут на
+        # следующем тике; их клиентам пока не пишем, чтобы при повторе не было дублей
+        delivered = max(delivered_lines - len(admin_header), 0)
+        logger.error(
+            f"❌ Ошибка отправки напоминания админу ({len(due) - delivered} из {len(due)} — повтор на следующем тике): {e}"
+        )
+        for fire_at, deadline, index in due[delivered:]:
+            heapq.heappush(DEADLINE_HEAP, (fire_at, deadline["id"], index))
+        due = due[:delivered]
+        if not due:
+            return 0
+
+    customer_lines: Dict[int, tuple] = {}
+    if REMIND_CUSTOMER:
+        for _, deadline, index in due:
+            lang = deadline["lang"] if deadline["lang"] in LOCALES else DEFAULT_LANG
+            customer_lines.setdefault(deadline["user_id"], (lang, []))[1].append(tr(
+                lang, "deadline_reminder_line",
+                type=LOCALES[lang]["work_types"].get(deadline["work_type"], deadline["work_type"]),
+                due=time.strftime("%d.%m.%Y %H:%M", time.localtime(deadline["due_at"]))
+            ))
+
+    for user_id, (lang, lines) in customer_lines.items():
+        try:
+            await bot.send_message(user_id, text=tr(lang, "deadline_reminder", lines="\n".join(lines)))
+        except Forbidden:
+            logger.info(f"Клиент {user_id} заблокировал бота, напоминание не доставлено")
+        except TelegramError as e:
+            logger.error(f"❌ Ошибка отправки напоминания клиенту {user_id}: {e}")
+
+    db = get_deadlines_db()
+    finished = []
+    updated = []
+    for _, deadline, index in due:
+        deadline["reminders_sent"] = index + 1
+        if deadline["reminders_sent"] >= len(REMINDER_OFFSETS_HOURS):
+            finished.append((deadline["id"],))
+            DEADLINES.pop(deadline["id"], None)
+        else:
+            updated.append((deadline["reminders_sent"], deadline["id"]))
+            schedule_deadline(deadline, now)
+    db.executemany("DELETE FROM deadlines WHERE id = ?", finished)
+    db.executemany("UPDATE deadlines SET reminders_sent = ? WHERE id = ?", updated)
+    db.commit()
+
+    logger.info(f"Отправлено напоминаний о сроках: {len(due)}")
+    return len(due)
+
+async def deadline_loop(bot) -> None:
+    while True:
+        try:
+            await process_due_reminders(bot)
+        except Exception:
+            logger.exception("Ошибка обработки напоминаний о сроках")
+        await asyncio.sleep(REMINDER_TICK_SECONDS)
+
+async def background_startup(app: Application) -> None:
+    """Некритичная инициализация — после запуска слушателя, чтобы не задерживать первое обновление"""
+    # post_init вызывается до старта polling/webhook: ждём, пока слушатель поднимется
+    while not (app.updater and app.updater.running):
+        await asyncio.sleep(0.05)
+    await rehydrate_deadlines()
+    await deadline_loop(app.bot)
+
+async def post_init(app: Application) -> None:
+    app.bot_data["deadline_task"] = asyncio.create_task(background_startup(app))
+
+async def post_shutdown(app: Application) -> None:
+    task = app.bot_data.pop("deadline_task", None)
+    if task:
+        task.cancel()
+    if _deadlines_db is not None:
+        _deadlines_db.close()
+
+# ========== ЗАПУСК ==========
+def build_application() -> Application:
+    builder = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .request(build_request("bot"))
+        .get_updates_request(build_request("updates"))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(BOT_API_BASE_URL)
+    app = builder.build()
 
     conv_handler = ConversationHandler(
         entry_points=[CommandHandler("start", start)],
@@ -766,7 +1322,7 @@ def main() -> None:
             EXPLAIN_CHOICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, explain_choice)],
             DEADLINE_CHOICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, deadline_choice)],
             EXTRA_PARAMS: [MessageHandler(filters.TEXT & ~filters.COMMAND, extra_params)],
-            CONFIRM_ORDER: [CallbackQueryHandler(confirm_callback)],
+            CONFIRM_ORDER: [CallbackQueryHandler(confirm_callback, pattern="^(confirm_pay|add_item|cancel)$")],
             PAYMENT: [MessageHandler(filters.SUCCESSFUL_PAYMENT, successful_payment_handler)],
             WAITING_FOR_RECEIPT: [MessageHandler(filters.ChatType.PRIVATE & ~filters.COMMAND, waiting_for_receipt)],
         },
@@ -776,10 +1332,32 @@ def main() -> None:
         per_chat=True,
     )
 
+    # Защита от флуда — в группе -1, до ConversationHandler
+    app.add_handler(TypeHandler(Update, flood_guard), group=-1)
     app.add_handler(conv_handler)
+    app.add_handler(CommandHandler("language", language_command))
+    app.add_handler(CallbackQueryHandler(language_callback, pattern="^lang:"))
+    app.add_handler(CommandHandler("stats", stats_command))
     app.add_handler(PreCheckoutQueryHandler(precheckout_handler))
     app.add_error_handler(error_handler)
 
+    return app
+
+def main() -> None:
+    """Главная функция запуска бота"""
+    logger.info("=" * 50)
+    logger.info("ЗАПУСК ТЕЛЕГРАМ БОТА")
+    logger.info(f"Токен: {'***' + TOKEN[-4:] if TOKEN else 'НЕ УСТАНОВЛЕН'}")
+    logger.info(f"Admin ID: {ADMIN_CHAT_ID}")
+    logger.info("=" * 50)
+
+    if not TOKEN:
+        logger.error("❌ Токен бота не установлен!")
+        logger.error("Добавьте переменную окружения TG_BOT_TOKEN в Bothost")
+        return
+
+    app = build_application()
+
     # Проверяем, работает ли на Bothost
     WEBHOOK_URL = os.getenv("WEBHOOK_URL")
     
@@ -798,11 +1376,12 @@ def main() -> None:
         except Exception as e:
             logger.error(f"Ошибка при запуске webhook: {e}")
             logger.info("Пробую запустить polling...")
-            app.run_polling(drop_pending_updates=True)
+            app.run_polling(drop_pending_updates=True, timeout=POLL_TIMEOUT)
     else:
         logger.info("Запуск в режиме POLLING")
         app.run_polling(
             drop_pending_updates=True,
+            timeout=POLL_TIMEOUT,
             close_loop=False
         )
 
@@ -0,0 +1,173 @@
+"""Правила расчёта стоимости — общие для бота (main.py) и симулятора цен (simulate_prices.py).
+
+Модуль не зависит от telegram, чтобы его можно было импортировать из утилит.
+"""
+
+from typing import Dict, Any, List
+
+# ========== ЦЕНЫ В РУБЛЯХ ==========
+BASE_PRICES = {
+    "Задание": 199,
+    "Лабораторная/Контрольная": 499,
+    "Экзаменационный вопрос": 599,
+    "Практика": 2999,
+    "Курсовая": 6999,
+    "Дипломная": 19999,
+    "Презентация для курсовой": 1999,
+    "Презентация для диплома": 4999,
+}
+
+# ========== ЦЕНЫ В ЕВРО ==========
+BASE_PRICES_EUR = {k: v // 100 for k, v in BASE_PRICES.items()}
+
+# Типы, цена которых умножается на количество заданий
+ITEMIZED_TYPES = ("Задание", "Лабораторная/Контрольная", "Экзаменационный вопрос")
+
+# ========== ДОПЛАТА ЗА ОБЪЯСНЕНИЯ ==========
+EXPLAIN_SURCHARGES = {
+    "default": 1999,
+    "Курсовая": 3999,
+    "Дипломная": 9999,
+    "Практика": 999,
+}
+
+# ========== НАДБАВКА ЗА СРОЧНОСТЬ ==========
+# Тип -> (надбавка за 1 день, уменьшение за каждый следующий день):
+# надбавка = max(старт - шаг * (дни - 1), 0).
+# Для дипломной и презентации к ней старт равен базовой цене — это прежняя
+# формула max(2 * base - 250 * (дни - 1), base) - base в упрощённом виде.
+URGENCY_RULES = {
+    "Задание": (1000, 100),
+    "Лабораторная/Контрольная": (1000, 100),
+    "Экзаменационный вопрос": (1500, 100),
+    "Практика": (4000, 250),
+    "Курсовая": (6000, 250),
+    "Презентация для курсовой": (6000, 250),
+    "Дипломная": (BASE_PRICES["Дипломная"], 250),
+    "Презентация для диплома": (BASE_PRICES["Презентация для диплома"], 250),
+}
+
+# ========== СКИДКИ ЗА КОМПЛЕКТ ==========
+# Скидка применяется к сумме позиций, которые вместе образуют комплект.
+# Один заказ может содержать несколько комплектов одного вида.
+# Названия комплектов берутся из языковых пакетов по "id".
+BUNDLE_DISCOUNTS = [
+    {
+        "id": "coursework_presentation",
+        "types": ("Курсовая", "Презентация для курсовой"),
+        "percent": 10,
+    },
+    {
+        "id": "thesis_presentation",
+        "types": ("Дипломная", "Презентация для диплома"),
+        "percent": 10,
+    },
+]
+
+# ========== ФУНКЦИИ ==========
+def urgency_surcharge(t: str, days: int) -> int:
+    """Надбавка за срочность в рублях (days >= 1)"""
+    if t not in URGENCY_RULES:
+        return 0
+    start, step = URGENCY_RULES[t]
+    return int(max(start - step * (days - 1), 0))
+
+def calculate_price(selection: Dict[str, Any]) -> Dict[str, Any]:
+    """Расчёт стоимости одной работы.
+
+    Детализация возвращается структурой (сумма в обеих валютах на строку),
+    текст собирается уже под язык пользователя через render_breakdown().
+    """
+    t = selection["type"]
+    explain = selection.get("explain", False)
+    days = int(selection.get("days", 0))
+    extra_count = int(selection.get("extra_count", 1))
+
+    lines = []
+    total_rub = 0
+    total_eur = 0
+
+    if t in ITEMIZED_TYPES:
+        base_rub = BASE_PRICES[t] * extra_count
+        base_eur = BASE_PRICES_EUR[t] * extra_count
+        lines.append({
+            "kind": "base_count",
+            "type": t,
+            "count": extra_count,
+            "unit_rub": BASE_PRICES[t],
+            "unit_eur": BASE_PRICES_EUR[t],
+            "rub": base_rub,
+            "eur": base_eur,
+        })
+        total_rub += base_rub
+        total_eur += base_eur
+    else:
+        base_rub = BASE_PRICES[t]
+        base_eur = BASE_PRICES_EUR[t]
+        lines.append({"kind": "base", "type": t, "rub": base_rub, "eur": base_eur})
+        total_rub += base_rub
+        total_eur += base_eur
+
+    if explain:
+        surcharge_rub = EXPLAIN_SURCHARGES.get(t, EXPLAIN_SURCHARGES["default"])
+        surcharge_eur = surcharge_rub // 100
+        lines.append({"kind": "explain", "rub": surcharge_rub, "eur": surcharge_eur})
+        total_rub += surcharge_rub
+        total_eur += surcharge_eur
+
+    if days > 0:
+        urgency_rub = urgency_surcharge(t, days)
+        urgency_eur = urgency_rub // 100
+
+        lines.append({"kind": "urgency", "days": days, "rub": urgency_rub, "eur": urgency_eur})
+        total_rub += urgency_rub
+        total_eur += urgency_eur
+    else:
+        if days == 0:
+            lines.append({"kind": "urgency_none", "rub": 0, "eur": 0})
+
+    return {
+        "total_rub": total_rub,
+        "total_eur": total_eur,
+        "lines": lines,
+    }
+
+def calculate_cart_price(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Расчёт стоимости корзины: все позиции за один проход + скидки за комплект"""
+    item_calcs = [calculate_price(item) for item in items]
+    subtotal_rub = sum(calc["total_rub"] for calc in item_calcs)
+    subtotal_eur = sum(calc["total_eur"] for calc in item_calcs)
+
+    # Индексы позиций по типам — каждая позиция входит не более чем в один комплект
+    free_by_type: Dict[str, List[int]] = {}
+    for i, item in enumerate(items):
+        free_by_type.setdefault(item["type"], []).append(i)
+
+    discounts = []
+    for bundle in BUNDLE_DISCOUNTS:
+        while all(free_by_type.get(t) for t in bundle["types"]):
+            members = [free_by_type[t].pop(0) for t in bundle["types"]]
+            bundle_rub = sum(item_calcs[i]["total_rub"] for i in members)
+            discount_rub = bundle_rub * bundle["percent"] // 100
+            discounts.append({
+                "kind": "bundle_discount",
+                "bundle": bundle["id"],
+                "percent": bundle["percent"],
+                "items": members,
+                "rub": discount_rub,
+                "eur": discount_rub // 100,
+            })
+
+    discount_rub = sum(d["rub"] for d in discounts)
+    discount_eur = sum(d["eur"] for d in discounts)
+
+    return {
+        "items": item_calcs,
+        "discounts": discounts,
+        "subtotal_rub": subtotal_rub,
+        "subtotal_eur": subtotal_eur,
+        "discount_rub": discount_rub,
+        "discount_eur": discount_eur,
+        "total_rub": subtotal_rub - discount_rub,
+        "total_eur": subtotal_eur - discount_eur,
+    }
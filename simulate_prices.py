@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Симулятор цен: расчёт стоимости по всей сетке параметров и поиск аномалий.
+
+Считает цены для всех сочетаний тип работы × срок × количество заданий ×
+объяснения (да/нет) одним векторным проходом NumPy по таблицам из pricing.py
+(те же, что использует бот), сверяет результат с calculate_price() и потоково
+пишет строки в CSV или JSON. Сводка по аномалиям выводится в stderr.
+
+Аномалии:
+- urgency_not_monotonic — надбавка за срочность растёт при увеличении срока;
+- total_not_monotonic — итог растёт при увеличении срока;
+- count_not_monotonic — больше заданий стоит дешевле;
+- eur_zero — итог в рублях положительный, а в евро округлился до нуля;
+- eur_part_zero — положительная часть цены (база, объяснения, срочность) в евро равна нулю.
+
+Примеры:
+    python simulate_prices.py --max-days 60 --max-count 20 -o prices.csv
+    python simulate_prices.py --format json --anomalies-only
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, TextIO
+
+import pricing
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только симулятору, не боту
+    np = None
+
+COLUMNS = [
+    "type",
+    "days",
+    "count",
+    "explain",
+    "base_rub",
+    "explain_rub",
+    "urgency_rub",
+    "total_rub",
+    "base_eur",
+    "explain_eur",
+    "urgency_eur",
+    "total_eur",
+    "anomalies",
+]
+
+ANOMALIES = [
+    "urgency_not_monotonic",
+    "total_not_monotonic",
+    "count_not_monotonic",
+    "eur_zero",
+    "eur_part_zero",
+]
+
+
+def quote_grid(types: List[str], max_days: int, max_count: int) -> Dict[str, Any]:
+    """Векторный расчёт цен; все массивы формы (типы, дни, количество, объяснения)"""
+    def per_type(values):
+        return np.array(values, dtype=np.int64)[:, None, None, None]
+
+    unit_rub = per_type([pricing.BASE_PRICES[t] for t in types])
+    unit_eur = per_type([pricing.BASE_PRICES_EUR[t] for t in types])
+    itemized = per_type([t in pricing.ITEMIZED_TYPES for t in types]).astype(bool)
+    explain_unit = per_type([
+        pricing.EXPLAIN_SURCHARGES.get(t, pricing.EXPLAIN_SURCHARGES["default"]) for t in types
+    ])
+    urgency_start = per_type([pricing.URGENCY_RULES.get(t, (0, 0))[0] for t in types])
+    urgency_step = per_type([pricing.URGENCY_RULES.get(t, (0, 0))[1] for t in types])
+
+    days = np.arange(1, max_days + 1, dtype=np.int64)[None, :, None, None]
+    counts = np.arange(1, max_count + 1, dtype=np.int64)[None, None, :, None]
+    explain = np.array([0, 1], dtype=np.int64)[None, None, None, :]
+
+    multiplier = np.where(itemized, counts, 1)
+    urgency_rub = np.maximum(urgency_start - urgency_step * (days - 1), 0)
+
+    grid = {
+        "days": days,
+        "count": counts,
+        "explain": explain,
+        "itemized": itemized,
+        "base_rub": unit_rub * multiplier,
+        "base_eur": unit_eur * multiplier,
+        "explain_rub": explain_unit * explain,
+        "explain_eur": (explain_unit // 100) * explain,
+        "urgency_rub": urgency_rub,
+        "urgency_eur": urgency_rub // 100,
+    }
+    shape = (len(types), max_days, max_count, 2)
+    grid = {key: np.broadcast_to(value, shape) for key, value in grid.items()}
+    grid["total_rub"] = grid["base_rub"] + grid["explain_rub"] + grid["urgency_rub"]
+    grid["total_eur"] = grid["base_eur"] + grid["explain_eur"] + grid["urgency_eur"]
+    # Для типов без количества имеет смысл только count = 1
+    grid["valid"] = grid["itemized"] | (grid["count"] == 1)
+    return grid
+
+
+def find_anomalies(grid: Dict[str, Any]) -> Dict[str, Any]:
+    """Булевы маски аномалий той же формы, что и сетка"""
+    def increases(values, axis):
+        # True там, где значение больше, чем в предыдущей точке по оси
+        grew = np.diff(values, axis=axis) > 0
+        pad = [(0, 0)] * values.ndim
+        pad[axis] = (1, 0)
+        return np.pad(grew, pad, constant_values=False)
+
+    def decreases(values, axis):
+        fell = np.diff(values, axis=axis) < 0
+        pad = [(0, 0)] * values.ndim
+        pad[axis] = (1, 0)
+        return np.pad(fell, pad, constant_values=False)
+
+    part_zero = np.zeros(grid["total_rub"].shape, dtype=bool)
+    for part in ("base", "explain", "urgency"):
+        part_zero |= (grid[f"{part}_rub"] > 0) & (grid[f"{part}_eur"] == 0)
+
+    return {
+        "urgency_not_monotonic": increases(grid["urgency_rub"], axis=1),
+        "total_not_monotonic": increases(grid["total_rub"], axis=1),
+        "count_not_monotonic": decreases(grid["total_rub"], axis=2) & grid["itemized"],
+        "eur_zero": (grid["total_rub"] > 0) & (grid["total_eur"] == 0),
+        "eur_part_zero": part_zero,
+    }
+
+
+def verify_against_bot(types: List[str], grid: Dict[str, Any]) -> None:
+    """Сверка векторного расчёта с calculate_price() бота в каждой точке сетки"""
+    for t_i, d_i, c_i, e_i in zip(*np.nonzero(grid["valid"])):
+        point = (t_i, d_i, c_i, e_i)
+        calc = pricing.calculate_price({
+            "type": types[t_i],
+            "days": int(grid["days"][point]),
+            "extra_count": int(grid["count"][point]),
+            "explain": bool(grid["explain"][point]),
+        })
+        expected = (calc["total_rub"], calc["total_eur"])
+        actual = (int(grid["total_rub"][point]), int(grid["total_eur"][point]))
+        if expected != actual:
+            sys.exit(
+                f"Расхождение с calculate_price для {types[t_i]}, дней {grid['days'][point]}, "
+                f"количество {grid['count'][point]}, объяснения {grid['explain'][point]}: "
+                f"бот {expected}, симулятор {actual}"
+            )
+
+
+def iter_rows(types: List[str], grid: Dict[str, Any], anomalies: Dict[str, Any], anomalies_only: bool) -> Iterator[Dict[str, Any]]:
+    mask = grid["valid"]
+    if anomalies_only:
+        any_anomaly = np.zeros(mask.shape, dtype=bool)
+        for flags in anomalies.values():
+            any_anomaly |= flags
+        mask = mask & any_anomaly
+    for point in zip(*np.nonzero(mask)):
+        row = {"type": types[point[0]]}
+        for column in COLUMNS[1:-1]:
+            value = int(grid[column][point])
+            row[column] = bool(value) if column == "explain" else value
+        row["anomalies"] = ";".join(name for name in ANOMALIES if anomalies[name][point])
+        yield row
+
+
+def write_csv(rows: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    writer = csv.DictWriter(out, fieldnames=COLUMNS)
+    writer.writeheader()
+    written = 0
+    for row in rows:
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+def write_json(rows: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    out.write("[")
+    written = 0
+    for row in rows:
+        out.write(("\n" if written == 0 else ",\n") + json.dumps(row, ensure_ascii=False))
+        written += 1
+    out.write("\n]\n")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[2:]),
+    )
+    parser.add_argument("--types", help="типы работ через запятую (по умолчанию — все)")
+    parser.add_argument("--max-days", type=int, default=30, help="сроки 1..N дней")
+    parser.add_argument("--max-count", type=int, default=10, help="количество заданий 1..N")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("-o", "--output", help="файл результата (по умолчанию — stdout)")
+    parser.add_argument("--anomalies-only", action="store_true", help="выводить только строки с аномалиями")
+    parser.add_argument("--no-verify", action="store_true", help="не сверять с calculate_price() бота")
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("Для симулятора нужен NumPy: pip install numpy")
+
+    types = [t.strip() for t in args.types.split(",")] if args.types else list(pricing.BASE_PRICES)
+    unknown = [t for t in types if t not in pricing.BASE_PRICES]
+    if unknown:
+        sys.exit(f"Неизвестные типы работ: {', '.join(unknown)}")
+    if args.max_days < 1 or args.max_count < 1:
+        sys.exit("--max-days и --max-count должны быть не меньше 1")
+
+    grid = quote_grid(types, args.max_days, args.max_count)
+    if not args.no_verify:
+        verify_against_bot(types, grid)
+    anomalies = find_anomalies(grid)
+
+    rows = iter_rows(types, grid, anomalies, args.anomalies_only)
+    write = write_csv if args.format == "csv" else write_json
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            written = write(rows, out)
+    else:
+        try:
+            written = write(rows, sys.stdout)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # Читатель закрыл канал раньше (например, `| head`) — выходим молча.
+            # stdout перенаправляется в devnull, чтобы интерпретатор не ругался при закрытии
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+
+    valid = grid["valid"]
+    print(f"Точек сетки: {int(valid.sum())}, строк записано: {written}", file=sys.stderr)
+    for name in ANOMALIES:
+        flags = anomalies[name] & valid
+        count = int(flags.sum())
+        line = f"  {name}: {count}"
+        if count:
+            t_i, d_i, c_i, e_i = (int(i[0]) for i in np.nonzero(flags))
+            line += (
+                f" (например: {types[t_i]}, дней {d_i + 1}, количество {c_i + 1}, "
+                f"объяснения {'да' if e_i else 'нет'})"
+            )
+        print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()